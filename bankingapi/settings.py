@@ -45,6 +45,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RequestProfilerMiddleware',
+    'core.middleware.AuditLogMiddleware',
 ]
 
 ROOT_URLCONF = 'bankingapi.urls'
@@ -91,6 +93,14 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing - existing PBKDF2 hashes are upgraded on next login
+PASSWORD_HASHERS = [
+    'core.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -121,7 +131,11 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+    },
+    'EXCEPTION_HANDLER': 'core.exceptions.exception_handler'
 }
 
 # Banking App Specific Settings
@@ -130,6 +144,11 @@ MINIMUM_BALANCE = 100.00
 ACCOUNT_NUMBER_LENGTH = 10
 DEMO_ACCOUNT_BALANCE = 50000.00
 DEFAULT_CURRENCY = 'NGN'
+CARD_ISSUER_BIN = '539983'  # 6 digits, follows the leading 4 in card numbers
+ISSUE_SESSION_ON_TOKEN_LOGIN = False  # also start a Django session on API login
+AUDIT_LOG_ASYNC = True  # write audit logs from a background thread (core.audit_queue)
+PROFILER_SAMPLE_RATE = 0.01  # fraction of requests timed by RequestProfilerMiddleware
+PROFILER_URI_REGEX = None  # e.g. r'^/api/transactions/' to profile only matching paths
 
 # CORS Settings for React Frontend - Very permissive for development
 CORS_ALLOW_ALL_ORIGINS = True  # Only for development!
@@ -1,11 +1,58 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.core.validators import RegexValidator
+from django.db import OperationalError, connection, transaction
+from django.utils.functional import cached_property
 from .models import (
     User, AccountType, BankAccount, TransactionCategory, 
     Transaction, Beneficiary, Card, AuditLog
 )
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that bounds the changelist COUNT(*) on large tables.
+    On PostgreSQL the count runs under a short statement timeout and falls
+    back to a large sentinel if it does not finish in time.
+    """
+    count_timeout_ms = 200
+    fallback_count = 9999999999
+
+    @cached_property
+    def count(self):
+        if connection.vendor != 'postgresql':
+            return super().count
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout TO %d' % self.count_timeout_ms)
+                return super().count
+        except OperationalError:
+            return self.fallback_count
+
+
+class SlimForeignKeyMixin:
+    """
+    Restrict foreign-key form field querysets to the columns needed to
+    render and validate the choice, instead of loading full rows.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        related_model = db_field.related_model
+        if related_model is BankAccount:
+            kwargs.setdefault('queryset', BankAccount.objects.select_related('user').only(
+                'id', 'account_number', 'user__username'
+            ))
+        elif related_model is User:
+            kwargs.setdefault('queryset', User.objects.only(
+                'id', 'username', 'first_name', 'last_name'
+            ))
+        elif related_model in (AccountType, TransactionCategory):
+            kwargs.setdefault('queryset', related_model.objects.only('id', 'name'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'phone_number', 'is_verified', 'is_staff')
@@ -31,13 +78,37 @@ class AccountTypeAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at',)
 
 
+class BankAccountAdminForm(forms.ModelForm):
+    # The stored PIN is a hash; staff set a new one here instead of editing it
+    new_pin = forms.CharField(
+        label='New PIN', required=False, max_length=6,
+        widget=forms.PasswordInput(render_value=False),
+        validators=[RegexValidator(r'^\d{4,6}$', 'PIN must be 4 to 6 digits.')],
+        help_text='Leave blank to keep the current PIN.'
+    )
+
+    class Meta:
+        model = BankAccount
+        fields = '__all__'
+
+    def save(self, commit=True):
+        if self.cleaned_data.get('new_pin'):
+            self.instance.set_pin(self.cleaned_data['new_pin'])
+        return super().save(commit=commit)
+
+
 @admin.register(BankAccount)
-class BankAccountAdmin(admin.ModelAdmin):
+class BankAccountAdmin(SlimForeignKeyMixin, admin.ModelAdmin):
+    form = BankAccountAdminForm
     list_display = ('account_number', 'user', 'account_type', 'balance', 'status', 'is_primary', 'created_at')
     list_filter = ('status', 'account_type', 'is_primary', 'created_at')
     search_fields = ('account_number', 'user__username', 'user__email')
     readonly_fields = ('id', 'account_number', 'created_at', 'updated_at')
     raw_id_fields = ('user',)
+    list_select_related = ('user', 'account_type')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'account_type')
 
 
 @admin.register(TransactionCategory)
@@ -48,34 +119,48 @@ class TransactionCategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(SlimForeignKeyMixin, admin.ModelAdmin):
     list_display = ('reference_number', 'account', 'transaction_type', 'amount', 'status', 'created_at')
     list_filter = ('transaction_type', 'status', 'category', 'created_at')
     search_fields = ('reference_number', 'account__account_number', 'description', 'recipient_account_number')
     readonly_fields = ('id', 'reference_number', 'created_at', 'updated_at')
     raw_id_fields = ('account',)
-    date_hierarchy = 'created_at'
+    # Only allow sorting on indexed columns (txn_created_idx and the unique
+    # reference_number); date drill-down is served by the created_at list
+    # filter rather than date_hierarchy's DISTINCT query
+    sortable_by = ('created_at', 'reference_number')
+    ordering = ('-created_at',)
+    list_select_related = ('account', 'account__user', 'category')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('account__user', 'category')
 
 
 @admin.register(Beneficiary)
-class BeneficiaryAdmin(admin.ModelAdmin):
+class BeneficiaryAdmin(SlimForeignKeyMixin, admin.ModelAdmin):
     list_display = ('account_name', 'user', 'account_number', 'bank_name', 'is_active', 'created_at')
     list_filter = ('bank_name', 'is_active', 'created_at')
     search_fields = ('account_name', 'account_number', 'user__username', 'nickname')
     raw_id_fields = ('user',)
+    list_select_related = ('user',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
 
 
 @admin.register(Card)
-class CardAdmin(admin.ModelAdmin):
+class CardAdmin(SlimForeignKeyMixin, admin.ModelAdmin):
     list_display = ('cardholder_name', 'card_type', 'status', 'expiry_date', 'daily_limit', 'created_at')
     list_filter = ('card_type', 'status', 'expiry_date', 'created_at')
     search_fields = ('cardholder_name', 'account__account_number', 'account__user__username')
     readonly_fields = ('id', 'card_number', 'cvv', 'pin', 'created_at', 'updated_at')
     raw_id_fields = ('account',)
+    list_select_related = ('account__user',)
 
-    def masked_card_number(self, obj):
-        return f"****{obj.card_number[-4:]}" if obj.card_number else "No card number"
-    masked_card_number.short_description = "Card Number"
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('account__user')
 
     def get_readonly_fields(self, request, obj=None):
         readonly_fields = list(super().get_readonly_fields(request, obj))
@@ -85,13 +170,21 @@ class CardAdmin(admin.ModelAdmin):
 
 
 @admin.register(AuditLog)
-class AuditLogAdmin(admin.ModelAdmin):
+class AuditLogAdmin(SlimForeignKeyMixin, admin.ModelAdmin):
     list_display = ('user', 'action_type', 'description', 'ip_address', 'created_at')
     list_filter = ('action_type', 'created_at')
-    search_fields = ('user__username', 'description', 'ip_address')
+    search_fields = ('user__username', 'description', 'ip_address', '=reference_number')
     readonly_fields = ('id', 'created_at')
     raw_id_fields = ('user',)
-    date_hierarchy = 'created_at'
+    # Sorting is limited to created_at, backed by auditlog_created_idx
+    sortable_by = ('created_at',)
+    ordering = ('-created_at',)
+    list_select_related = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
 
     def has_add_permission(self, request):
         return False  # Audit logs should not be manually created
@@ -0,0 +1,61 @@
+"""
+Request-scoped buffering of audit log entries.
+
+Entries are admitted only once the surrounding database transaction commits,
+so rolled-back actions are never logged. When the response goes out,
+AuditLogMiddleware hands them to the background writer in audit_queue, or
+bulk-inserts them directly if AUDIT_LOG_ASYNC is off.
+"""
+from functools import partial
+from django.conf import settings
+from django.db import transaction
+from . import audit_queue
+from .models import AuditLog
+
+
+def _http_request(request):
+    # DRF's Request wraps the HttpRequest that middleware sees
+    return getattr(request, '_request', request)
+
+
+def client_context(request):
+    """Return the client's (ip_address, user_agent), read from META once per request"""
+    http_request = _http_request(request)
+    try:
+        return http_request._client_ctx
+    except AttributeError:
+        meta = http_request.META
+        http_request._client_ctx = (meta.get('REMOTE_ADDR'), meta.get('HTTP_USER_AGENT'))
+        return http_request._client_ctx
+
+
+def log_action(request, action_type, description, user=None, **fields):
+    """Buffer an audit log entry for the current request"""
+    http_request = _http_request(request)
+    if not hasattr(http_request, '_audit_logs'):
+        http_request._audit_logs = []
+
+    ip_address, user_agent = client_context(http_request)
+    entry = AuditLog(
+        user=request.user if user is None else user,
+        action_type=action_type,
+        description=description,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        **fields
+    )
+    transaction.on_commit(partial(http_request._audit_logs.append, entry))
+
+
+def flush_audit_logs(request):
+    """Write all committed entries buffered for the request"""
+    entries = getattr(_http_request(request), '_audit_logs', None)
+    if entries:
+        # While a transaction is still open (ATOMIC_REQUESTS, or a caller's
+        # atomic block) entries may reference rows the writer thread's
+        # connection can't see yet, so write those on this connection
+        if settings.AUDIT_LOG_ASYNC and not transaction.get_connection().in_atomic_block:
+            audit_queue.enqueue(list(entries))
+        else:
+            AuditLog.objects.bulk_create(entries, batch_size=500)
+        entries.clear()
@@ -0,0 +1,91 @@
+"""
+Background writer for audit log entries.
+
+Entries are handed to a daemon thread that writes them in batches of up to
+BATCH_SIZE, or whatever has arrived within FLUSH_INTERVAL seconds, so requests
+don't wait on the INSERT. Whatever is still queued is written at interpreter
+exit (including a SIGTERM'd gunicorn worker's normal shutdown).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from django.db import close_old_connections
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 5  # seconds
+SHUTDOWN_TIMEOUT = 10  # seconds
+
+_queue = queue.Queue(maxsize=10000)
+_stop = object()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _write(batch):
+    try:
+        AuditLog.objects.bulk_create(batch)
+    except Exception:
+        logger.exception('audit_log_write_failed', extra={'entries': len(batch)})
+
+
+def _run():
+    while True:
+        batch = []
+        item = _queue.get()
+        taken = 1
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while item is not _stop:
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                break
+            try:
+                item = _queue.get(timeout=max(deadline - time.monotonic(), 0))
+                taken += 1
+            except queue.Empty:
+                break
+        if batch:
+            _write(batch)
+            close_old_connections()
+        for _ in range(taken):
+            _queue.task_done()
+        if item is _stop:
+            return
+
+
+def _shutdown():
+    _queue.put(_stop)
+    _worker.join(SHUTDOWN_TIMEOUT)
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_run, name='audit-log-writer', daemon=True)
+            _worker.start()
+            atexit.register(_shutdown)
+
+
+def join():
+    """Block until every queued entry has been written (or failed and logged)"""
+    _queue.join()
+
+
+def enqueue(entries):
+    """Queue unsaved AuditLog instances for the background writer"""
+    _ensure_worker()
+    for i, entry in enumerate(entries):
+        try:
+            _queue.put_nowait(entry)
+        except queue.Full:
+            # Never drop audit entries; write the overflow on the caller's thread
+            logger.warning('audit_queue_full')
+            _write(entries[i:])
+            return
@@ -0,0 +1,26 @@
+"""
+DRF exception handling for the core app
+"""
+from django.db import DatabaseError
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler as drf_exception_handler
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def exception_handler(exc, context):
+    """
+    DRF's default handler, plus a logged 500 for database errors so views
+    don't need their own catch-all around atomic blocks.
+    """
+    response = drf_exception_handler(exc, context)
+    if response is None and isinstance(exc, DatabaseError):
+        view = context.get('view')
+        logger.exception('database_error', extra={'view': type(view).__name__ if view else None})
+        response = Response(
+            {'error': 'Request failed. Please try again.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return response
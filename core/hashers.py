@@ -0,0 +1,13 @@
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the OWASP minimum parameters (19 MiB, 2 passes, 1 lane).
+    Verifies considerably faster than Django's Argon2/PBKDF2 defaults while
+    staying memory-hard.
+    """
+    algorithm = 'argon2'
+    time_cost = 2
+    memory_cost = 19456
+    parallelism = 1
@@ -0,0 +1,33 @@
+"""
+Cached primary-key lookups for reference rows that are effectively static
+(account types, transaction categories).
+"""
+from django.db import transaction as db_transaction
+from .models import AccountType, TransactionCategory
+
+
+_lookup_ids = {}
+
+
+def _get_or_create_id(model, name, defaults):
+    key = (model, name)
+    pk = _lookup_ids.get(key)
+    if pk is None:
+        pk = model.objects.get_or_create(name=name, defaults=defaults)[0].pk
+        # Only remember rows that are known to be committed
+        db_transaction.on_commit(lambda: _lookup_ids.__setitem__(key, pk))
+    return pk
+
+
+def get_account_type_id(name, **defaults):
+    """Return the pk of the named AccountType, creating it on first use"""
+    return _get_or_create_id(AccountType, name, defaults)
+
+
+def get_transaction_category_id(name, **defaults):
+    """Return the pk of the named TransactionCategory, creating it on first use"""
+    return _get_or_create_id(TransactionCategory, name, defaults)
+
+
+def clear_lookup_cache():
+    _lookup_ids.clear()
@@ -0,0 +1,53 @@
+from django.conf import settings
+from .audit import flush_audit_logs
+import logging
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogMiddleware:
+    """
+    Write the audit log entries buffered during a request in one INSERT
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        flush_audit_logs(request)
+        return response
+
+
+class RequestProfilerMiddleware:
+    """
+    Log the duration of a sample of requests. A request is profiled when its
+    path matches PROFILER_URI_REGEX (if set), and then only with probability
+    PROFILER_SAMPLE_RATE; everything else passes straight through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        uri_regex = settings.PROFILER_URI_REGEX
+        self.uri_match = re.compile(uri_regex).match if uri_regex else None
+
+    def __call__(self, request):
+        if (
+            not self.sample_rate
+            or (self.uri_match is not None and not self.uri_match(request.path))
+            or random.random() >= self.sample_rate
+        ):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        response = self.get_response(request)
+        logger.info(
+            'request_profile method=%s path=%s status=%s duration_ms=%.1f',
+            request.method, request.path, response.status_code,
+            (time.perf_counter() - start) * 1000
+        )
+        return response
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-15 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_auto_20250613_1216'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action_type',
+            field=models.CharField(choices=[('LOGIN', 'Login'), ('LOGOUT', 'Logout'), ('TRANSACTION', 'Transaction'), ('ACCOUNT_UPDATE', 'Account Update'), ('PASSWORD_CHANGE', 'Password Change'), ('CARD_OPERATION', 'Card Operation'), ('BENEFICIARY_OP', 'Beneficiary Operation')], db_index=True, max_length=25),
+        ),
+        migrations.AlterField(
+            model_name='bankaccount',
+            name='status',
+            field=models.CharField(choices=[('ACTIVE', 'Active'), ('INACTIVE', 'Inactive'), ('SUSPENDED', 'Suspended'), ('CLOSED', 'Closed')], db_index=True, default='ACTIVE', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='card',
+            name='status',
+            field=models.CharField(choices=[('ACTIVE', 'Active'), ('BLOCKED', 'Blocked'), ('EXPIRED', 'Expired'), ('CANCELLED', 'Cancelled')], db_index=True, default='ACTIVE', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='recipient_account_number',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], db_index=True, default='PENDING', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('CREDIT', 'Credit'), ('DEBIT', 'Debit')], db_index=True, max_length=6),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', '-created_at'], name='txn_account_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', '-created_at'], name='txn_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+def populate_masked_card_number(apps, schema_editor):
+    Card = apps.get_model('core', 'Card')
+    cards = list(Card.objects.only('id', 'card_number'))
+    for card in cards:
+        card.masked_card_number = f"****{card.card_number[-4:]}"
+    Card.objects.bulk_update(cards, ['masked_card_number'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_transaction_amount_positive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='card',
+            name='masked_card_number',
+            field=models.CharField(default='', editable=False, max_length=8),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_masked_card_number, migrations.RunPython.noop),
+    ]
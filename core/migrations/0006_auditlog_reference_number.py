@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-15 10:30
+
+from django.db import migrations, models
+
+
+def populate_reference_number(apps, schema_editor):
+    AuditLog = apps.get_model('core', 'AuditLog')
+    logs = list(AuditLog.objects.filter(additional_data__has_key='reference_number'))
+    for log in logs:
+        log.reference_number = log.additional_data['reference_number']
+    AuditLog.objects.bulk_update(logs, ['reference_number'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_card_masked_card_number'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='reference_number',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+        migrations.RunPython(populate_reference_number, migrations.RunPython.noop),
+    ]
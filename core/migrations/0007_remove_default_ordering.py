@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-15 11:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_auditlog_reference_number'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='auditlog',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={},
+        ),
+    ]
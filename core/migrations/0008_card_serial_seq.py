@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-15 11:30
+
+from django.db import migrations
+
+
+def create_card_serial_seq(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE SEQUENCE IF NOT EXISTS card_serial_seq MAXVALUE 99999999')
+
+
+def drop_card_serial_seq(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP SEQUENCE IF EXISTS card_serial_seq')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_remove_default_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_card_serial_seq, drop_card_serial_seq),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-15 12:00
+
+from django.contrib.auth.hashers import make_password
+from django.db import migrations, models
+
+
+def hash_existing_pins(apps, schema_editor):
+    BankAccount = apps.get_model('core', 'BankAccount')
+    accounts = list(BankAccount.objects.exclude(pin__isnull=True).exclude(pin='').only('id', 'pin'))
+    for account in accounts:
+        account.pin = make_password(account.pin)
+    BankAccount.objects.bulk_update(accounts, ['pin'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_card_serial_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bankaccount',
+            name='pin',
+            field=models.CharField(blank=True, editable=False, max_length=128, null=True),
+        ),
+        migrations.RunPython(hash_existing_pins, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-15 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_hash_bank_account_pin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-created_at'], name='auditlog_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-created_at'], name='txn_created_idx'),
+        ),
+    ]
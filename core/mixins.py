@@ -0,0 +1,18 @@
+"""
+Shared viewset mixins
+"""
+
+
+class EagerLoadingMixin:
+    """
+    Apply the serializer's setup_eager_loading() to every queryset the view
+    filters (list and detail), so the relations a serializer reads are
+    declared once, next to its fields, instead of in each get_queryset.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        setup_eager_loading = getattr(self.get_serializer_class(), 'setup_eager_loading', None)
+        if setup_eager_loading is not None:
+            queryset = setup_eager_loading(queryset)
+        return queryset
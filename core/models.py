@@ -1,11 +1,33 @@
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, connection, models, transaction as db_transaction
+from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.models import AbstractUser
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.validators import MaxValueValidator
 from django.utils import timezone
+from django.utils.functional import cached_property
 from decimal import Decimal
+import re
 import uuid
-import random
-import string
+import secrets
+
+
+_PHONE_PREFIX = re.compile(r'^(?:\+234|0+)')
+_PHONE_CLEAN = str.maketrans('', '', ' -')
+
+# Attempts at inserting a row with a freshly generated unique identifier
+_UNIQUE_ATTEMPTS = 3
+
+# Luhn doubling of each digit, with the digit sum already applied
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def luhn_check_digit(digits):
+    """Return the Luhn check digit for a string of digits"""
+    total = 0
+    for position, digit in enumerate(reversed(digits)):
+        digit = int(digit)
+        total += _LUHN_DOUBLED[digit] if position % 2 == 0 else digit
+    return str(-total % 10)
 
 
 class User(AbstractUser):
@@ -25,6 +47,10 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} - {self.get_full_name()}"
 
+    @cached_property
+    def full_name(self):
+        return self.get_full_name()
+
     class Meta:
         db_table = 'users'
 
@@ -66,9 +92,9 @@ class BankAccount(models.Model):
     account_number = models.CharField(max_length=20, unique=True, editable=False)
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
     available_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0.00)
-    status = models.CharField(max_length=10, choices=ACCOUNT_STATUS_CHOICES, default='ACTIVE')
+    status = models.CharField(max_length=10, choices=ACCOUNT_STATUS_CHOICES, default='ACTIVE', db_index=True)
     is_primary = models.BooleanField(default=False)
-    pin = models.CharField(max_length=6, null=True, blank=True)  # Encrypted in production
+    pin = models.CharField(max_length=128, null=True, blank=True, editable=False)  # Hashed, see set_pin()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -77,21 +103,73 @@ class BankAccount(models.Model):
             self.account_number = self.generate_account_number()
         super().save(*args, **kwargs)
 
+    def set_pin(self, raw_pin):
+        self.pin = make_password(raw_pin)
+
+    def check_pin(self, raw_pin):
+        """Check a raw PIN against the stored hash in constant time"""
+        if not self.pin:
+            return False
+        return check_password(raw_pin, self.pin)
+
+    @staticmethod
+    def move_funds(sender, recipient, amount):
+        """
+        Debit sender and credit recipient in a single UPDATE, leaving both
+        instances holding the stored balances. On PostgreSQL these come back
+        from the UPDATE itself via RETURNING.
+        """
+        now = timezone.now()
+        if connection.vendor == 'postgresql':
+            pk_field = BankAccount._meta.pk
+            sender_id = pk_field.get_db_prep_value(sender.pk, connection)
+            recipient_id = pk_field.get_db_prep_value(recipient.pk, connection)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {connection.ops.quote_name(BankAccount._meta.db_table)} SET "
+                    "balance = CASE WHEN id = %s THEN balance - %s ELSE balance + %s END, "
+                    "available_balance = CASE WHEN id = %s THEN available_balance - %s "
+                    "ELSE available_balance + %s END, "
+                    "updated_at = %s "
+                    "WHERE id IN (%s, %s) RETURNING id, balance, available_balance",
+                    [sender_id, amount, amount, sender_id, amount, amount, now,
+                     sender_id, recipient_id]
+                )
+                balances = {row[0]: row[1:] for row in cursor.fetchall()}
+            sender.balance, sender.available_balance = balances[sender.pk]
+            recipient.balance, recipient.available_balance = balances[recipient.pk]
+        else:
+            BankAccount.objects.filter(pk__in=[sender.pk, recipient.pk]).update(
+                balance=models.Case(
+                    models.When(pk=sender.pk, then=models.F('balance') - amount),
+                    default=models.F('balance') + amount
+                ),
+                available_balance=models.Case(
+                    models.When(pk=sender.pk, then=models.F('available_balance') - amount),
+                    default=models.F('available_balance') + amount
+                ),
+                updated_at=now
+            )
+            sender.balance -= amount
+            sender.available_balance -= amount
+            recipient.balance += amount
+            recipient.available_balance += amount
+        sender.updated_at = recipient.updated_at = now
+
     def generate_account_number(self):
         """Generate account number based on phone number (remove leading zero)"""
         if self.user and self.user.phone_number:
-            # Remove leading zero and take up to 10 digits
-            phone_digits = self.user.phone_number.lstrip('0').replace('+234', '').replace(' ', '').replace('-', '')
+            # Remove leading zero / country code and separators, take up to 10 digits
+            phone_digits = _PHONE_PREFIX.sub('', self.user.phone_number).translate(_PHONE_CLEAN)
             if len(phone_digits) >= 10:
                 return phone_digits[:10]
             else:
                 # If phone number is too short, pad with random digits
                 remaining_digits = 10 - len(phone_digits)
-                random_digits = ''.join(random.choices(string.digits, k=remaining_digits))
-                return phone_digits + random_digits
+                return phone_digits + f"{secrets.randbelow(10**remaining_digits):0{remaining_digits}d}"
         else:
             # Fallback to random 10-digit number
-            return ''.join(random.choices(string.digits, k=10))
+            return f"{secrets.randbelow(10**10):010d}"
 
     def __str__(self):
         return f"{self.user.username} - {self.account_number}"
@@ -137,17 +215,17 @@ class Transaction(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='transactions')
-    transaction_type = models.CharField(max_length=6, choices=TRANSACTION_TYPE_CHOICES)
+    transaction_type = models.CharField(max_length=6, choices=TRANSACTION_TYPE_CHOICES, db_index=True)
     category = models.ForeignKey(TransactionCategory, on_delete=models.PROTECT)
-    amount = models.DecimalField(max_digits=15, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
     balance_before = models.DecimalField(max_digits=15, decimal_places=2)
     balance_after = models.DecimalField(max_digits=15, decimal_places=2)
     description = models.CharField(max_length=255)
     reference_number = models.CharField(max_length=50, unique=True, editable=False)
-    status = models.CharField(max_length=10, choices=TRANSACTION_STATUS_CHOICES, default='PENDING')
+    status = models.CharField(max_length=10, choices=TRANSACTION_STATUS_CHOICES, default='PENDING', db_index=True)
     
     # For transfers and external transactions
-    recipient_account_number = models.CharField(max_length=20, null=True, blank=True)
+    recipient_account_number = models.CharField(max_length=20, null=True, blank=True, db_index=True)
     recipient_name = models.CharField(max_length=100, null=True, blank=True)
     sender_account_number = models.CharField(max_length=20, null=True, blank=True)
     sender_name = models.CharField(max_length=100, null=True, blank=True)
@@ -161,29 +239,40 @@ class Transaction(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.reference_number:
+        if self.reference_number:
+            return super().save(*args, **kwargs)
+
+        # Uniqueness is enforced by the unique index; regenerate on collision
+        for attempt in range(_UNIQUE_ATTEMPTS):
             self.reference_number = self.generate_reference_number()
-        super().save(*args, **kwargs)
+            try:
+                with db_transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == _UNIQUE_ATTEMPTS - 1:
+                    raise
 
     def generate_reference_number(self):
-        """Generate a unique reference number"""
+        """Generate a reference number (TXN + timestamp + 8 random hex chars)"""
         timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-        random_digits = ''.join(random.choices(string.digits, k=4))
-        reference = f"TXN{timestamp}{random_digits}"
-        
-        # Ensure uniqueness
-        while Transaction.objects.filter(reference_number=reference).exists():
-            random_digits = ''.join(random.choices(string.digits, k=4))
-            reference = f"TXN{timestamp}{random_digits}"
-        
-        return reference
+        return f"TXN{timestamp}{secrets.token_hex(4).upper()}"
 
     def __str__(self):
         return f"{self.reference_number} - {self.amount}"
 
     class Meta:
         db_table = 'transactions'
-        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['account', '-created_at'], name='txn_account_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='txn_status_created_idx'),
+            models.Index(fields=['-created_at'], name='txn_created_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(amount__gte=Decimal('0.01')),
+                name='transaction_amount_positive',
+            ),
+        ]
 
 
 class Beneficiary(models.Model):
@@ -226,40 +315,65 @@ class Card(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='cards')
     card_number = models.CharField(max_length=16, unique=True, editable=False)
+    masked_card_number = models.CharField(max_length=8, editable=False)
     card_type = models.CharField(max_length=6, choices=CARD_TYPE_CHOICES)
     cardholder_name = models.CharField(max_length=100)
     expiry_date = models.DateField()
     cvv = models.CharField(max_length=3, editable=False)
     pin = models.CharField(max_length=4, editable=False)
-    status = models.CharField(max_length=10, choices=CARD_STATUS_CHOICES, default='ACTIVE')
+    status = models.CharField(max_length=10, choices=CARD_STATUS_CHOICES, default='ACTIVE', db_index=True)
     daily_limit = models.DecimalField(max_digits=10, decimal_places=2, default=100000.00)
     is_international = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.card_number:
-            self.card_number = self.generate_card_number()
         if not self.cvv:
             self.cvv = self.generate_cvv()
         if not self.pin:
             self.pin = self.generate_pin()
-        super().save(*args, **kwargs)
+        if self.card_number:
+            self.masked_card_number = self.mask_card_number(self.card_number)
+            return super().save(*args, **kwargs)
+
+        # Uniqueness is enforced by the unique index; regenerate on collision
+        for attempt in range(_UNIQUE_ATTEMPTS):
+            self.card_number = self.generate_card_number()
+            self.masked_card_number = self.mask_card_number(self.card_number)
+            try:
+                with db_transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == _UNIQUE_ATTEMPTS - 1:
+                    raise
 
     def generate_card_number(self):
-        """Generate a unique 16-digit card number"""
-        while True:
-            card_number = '4' + ''.join(random.choices(string.digits, k=15))  # Starts with 4 (Visa)
-            if not Card.objects.filter(card_number=card_number).exists():
-                return card_number
+        """
+        Generate a 16-digit Luhn-valid card number: 4 (Visa) + issuer BIN +
+        8-digit serial + check digit. On PostgreSQL the serial comes from
+        card_serial_seq and is unique by construction; elsewhere it is random.
+        """
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT nextval('card_serial_seq')")
+                serial = cursor.fetchone()[0]
+        else:
+            serial = secrets.randbelow(10**8)
+        payload = f"4{settings.CARD_ISSUER_BIN}{serial:08d}"
+        return payload + luhn_check_digit(payload)
+
+    @staticmethod
+    def mask_card_number(card_number):
+        """Mask all but the last four digits"""
+        return f"****{card_number[-4:]}"
 
     def generate_cvv(self):
         """Generate a 3-digit CVV"""
-        return ''.join(random.choices(string.digits, k=3))
+        return f"{secrets.randbelow(1000):03d}"
 
     def generate_pin(self):
         """Generate a 4-digit PIN"""
-        return ''.join(random.choices(string.digits, k=4))
+        return f"{secrets.randbelow(10000):04d}"
 
     def __str__(self):
         return f"{self.cardholder_name} - ****{self.card_number[-4:]}"
@@ -284,11 +398,13 @@ class AuditLog(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
-    action_type = models.CharField(max_length=25, choices=ACTION_TYPE_CHOICES)
+    action_type = models.CharField(max_length=25, choices=ACTION_TYPE_CHOICES, db_index=True)
     description = models.TextField()
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     additional_data = models.JSONField(null=True, blank=True)
+    # Promoted out of additional_data so lookups by transaction can use an index
+    reference_number = models.CharField(max_length=50, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -296,4 +412,6 @@ class AuditLog(models.Model):
 
     class Meta:
         db_table = 'audit_logs'
-        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='auditlog_created_idx'),
+        ]
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .lookups import clear_lookup_cache
+from .models import AccountType, TransactionCategory
+
+
+@receiver([post_save, post_delete], sender=AccountType)
+@receiver([post_save, post_delete], sender=TransactionCategory)
+def invalidate_lookup_cache(sender, **kwargs):
+    """Drop cached reference-row ids whenever one is edited (e.g. from the admin)"""
+    clear_lookup_cache()
+
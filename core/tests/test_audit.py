@@ -0,0 +1,146 @@
+"""
+Test cases for audit logging
+"""
+from unittest import mock
+import queue
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from decimal import Decimal
+from core import audit_queue
+from core.audit import flush_audit_logs, log_action
+from core.models import AccountType, AuditLog, BankAccount, Transaction
+
+User = get_user_model()
+
+
+@override_settings(AUDIT_LOG_ASYNC=False)
+class AuditLogMiddlewareTest(TransactionTestCase):
+    """Test audit entries are written for committed actions only"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            phone_number='08123456789',
+            password='testpass123'
+        )
+        self.recipient = User.objects.create_user(
+            username='recipient',
+            email='recipient@example.com',
+            phone_number='08123456790',
+            password='testpass123'
+        )
+        account_type = AccountType.objects.create(name='Savings')
+        self.sender_account = BankAccount.objects.create(
+            user=self.user,
+            account_type=account_type,
+            balance=Decimal('10000.00'),
+            available_balance=Decimal('10000.00'),
+            is_primary=True
+        )
+        self.sender_account.set_pin('1234')
+        self.sender_account.save()
+        self.recipient_account = BankAccount.objects.create(
+            user=self.recipient,
+            account_type=account_type,
+            balance=Decimal('5000.00'),
+            available_balance=Decimal('5000.00')
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+    
+    def test_committed_action_is_logged(self):
+        """Test a completed action leaves one audit row"""
+        url = reverse('user-update-profile')
+        response = self.client.patch(url, {'first_name': 'Changed'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        log = AuditLog.objects.get(action_type='ACCOUNT_UPDATE')
+        self.assertEqual(log.user, self.user)
+        self.assertEqual(log.description, 'Profile updated')
+    
+    def test_rolled_back_transfer_is_not_logged(self):
+        """Test the audit entry of a transfer that rolls back is dropped"""
+        def log_then_fail(*args, **kwargs):
+            log_action(*args, **kwargs)
+            raise DatabaseError('failure after the audit entry')
+        
+        url = reverse('transaction-transfer')
+        data = {
+            'recipient_account_number': self.recipient_account.account_number,
+            'amount': '1000.00',
+            'description': 'Test transfer',
+            'pin': '1234'
+        }
+        with mock.patch('core.views.log_action', side_effect=log_then_fail), \
+                self.assertLogs('core.exceptions', level='ERROR'), \
+                self.assertLogs('django.request', level='ERROR'):
+            response = self.client.post(url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(AuditLog.objects.exists())
+        self.assertFalse(Transaction.objects.exists())
+        self.sender_account.refresh_from_db()
+        self.assertEqual(self.sender_account.balance, Decimal('10000.00'))
+
+
+class AuditQueueTest(TransactionTestCase):
+    """Test the background audit log writer"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            phone_number='08123456789',
+            password='testpass123'
+        )
+        self.request = RequestFactory().post('/api/auth/login/', REMOTE_ADDR='127.0.0.1')
+        self.request.user = self.user
+    
+    @override_settings(AUDIT_LOG_ASYNC=True)
+    def test_entries_are_written_in_a_batch_by_the_worker(self):
+        """Test flushed entries go through the queue and land in one bulk write"""
+        log_action(self.request, 'LOGIN', 'User logged in')
+        log_action(self.request, 'LOGOUT', 'User logged out')
+        
+        with mock.patch.object(audit_queue, 'FLUSH_INTERVAL', 0.05), \
+                mock.patch.object(audit_queue, '_write', wraps=audit_queue._write) as write:
+            flush_audit_logs(self.request)
+            audit_queue.join()
+        
+        write.assert_called_once()
+        self.assertEqual(len(write.call_args.args[0]), 2)
+        self.assertEqual(
+            set(AuditLog.objects.values_list('action_type', flat=True)), {'LOGIN', 'LOGOUT'}
+        )
+        self.assertEqual(AuditLog.objects.get(action_type='LOGIN').ip_address, '127.0.0.1')
+    
+    def test_full_queue_writes_inline(self):
+        """Test entries that don't fit in the queue are written on the caller's thread"""
+        entries = [
+            AuditLog(user=self.user, action_type='LOGIN', description='User logged in'),
+            AuditLog(user=self.user, action_type='LOGOUT', description='User logged out'),
+        ]
+        
+        with mock.patch.object(audit_queue._queue, 'put_nowait', side_effect=queue.Full), \
+                self.assertLogs('core.audit_queue', level='WARNING'):
+            audit_queue.enqueue(entries)
+        
+        self.assertEqual(AuditLog.objects.count(), 2)
+    
+    @override_settings(AUDIT_LOG_ASYNC=False)
+    def test_sync_path_when_async_disabled(self):
+        """Test entries are inserted directly when AUDIT_LOG_ASYNC is off"""
+        log_action(self.request, 'LOGIN', 'User logged in')
+        
+        with mock.patch.object(audit_queue, 'enqueue') as enqueue:
+            flush_audit_logs(self.request)
+        
+        enqueue.assert_not_called()
+        self.assertEqual(AuditLog.objects.count(), 1)
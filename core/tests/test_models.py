@@ -9,7 +9,7 @@ from decimal import Decimal
 from datetime import date, timedelta
 from core.models import (
     User, AccountType, BankAccount, TransactionCategory, 
-    Transaction, Beneficiary, Card, AuditLog
+    Transaction, Beneficiary, Card, AuditLog, luhn_check_digit
 )
 
 User = get_user_model()
@@ -152,6 +152,22 @@ class BankAccountModelTest(TestCase):
         )
         expected = f"{self.user.username} - {account.account_number}"
         self.assertEqual(str(account), expected)
+    
+    def test_set_and_check_pin(self):
+        """Test the PIN is stored hashed and verified against the hash"""
+        account = BankAccount.objects.create(
+            user=self.user,
+            account_type=self.account_type
+        )
+        self.assertFalse(account.check_pin('1234'))  # No PIN set yet
+        
+        account.set_pin('1234')
+        account.save()
+        account.refresh_from_db()
+        
+        self.assertNotEqual(account.pin, '1234')
+        self.assertTrue(account.check_pin('1234'))
+        self.assertFalse(account.check_pin('4321'))
 
 
 class TransactionCategoryModelTest(TestCase):
@@ -219,7 +235,7 @@ class TransactionModelTest(TestCase):
             description='Test credit'
         )
         self.assertTrue(transaction.reference_number.startswith('TXN'))
-        self.assertEqual(len(transaction.reference_number), 21)  # TXN + 14 digits timestamp + 4 random
+        self.assertEqual(len(transaction.reference_number), 25)  # TXN + 14 digits timestamp + 8 hex
     
     def test_transaction_string_representation(self):
         """Test transaction string representation"""
@@ -315,6 +331,17 @@ class CardModelTest(TestCase):
         self.assertEqual(len(card.cvv), 3)
         self.assertEqual(len(card.pin), 4)
     
+    def test_card_number_luhn_check_digit(self):
+        """Test generated card numbers carry a valid Luhn check digit"""
+        self.assertEqual(luhn_check_digit('7992739871'), '3')
+        card = Card.objects.create(
+            account=self.account,
+            card_type='DEBIT',
+            cardholder_name='Test User',
+            expiry_date=date.today() + timedelta(days=365*3)
+        )
+        self.assertEqual(card.card_number[-1], luhn_check_digit(card.card_number[:-1]))
+    
     def test_card_string_representation(self):
         """Test card string representation"""
         card = Card.objects.create(
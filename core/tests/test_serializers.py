@@ -11,9 +11,9 @@ from core.models import (
     Transaction, Beneficiary, Card
 )
 from core.serializers import (
-    UserSerializer, UserRegistrationSerializer, BankAccountSerializer,
+    UserProfileSerializer, UserRegistrationSerializer, BankAccountSerializer,
     TransactionSerializer, BeneficiarySerializer, CardSerializer,
-    TransferSerializer, AccountValidationSerializer
+    TransferSerializer
 )
 
 User = get_user_model()
@@ -34,8 +34,8 @@ class UserSerializerTest(TestCase):
         self.user = User.objects.create_user(**self.user_data)
     
     def test_user_serializer(self):
-        """Test UserSerializer serialization"""
-        serializer = UserSerializer(self.user)
+        """Test UserProfileSerializer serialization"""
+        serializer = UserProfileSerializer(self.user)
         data = serializer.data
         
         self.assertEqual(data['username'], 'testuser')
@@ -62,6 +62,27 @@ class UserSerializerTest(TestCase):
         self.assertEqual(user.email, 'new@example.com')
         self.assertTrue(user.check_password('newpass123'))
     
+    def test_user_registration_creates_welcome_transaction_on_commit(self):
+        """Test the welcome transaction is recorded after the registration commits"""
+        registration_data = {
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'phone_number': '08123456790',
+            'password': 'newpass123',
+            'password_confirm': 'newpass123'
+        }
+        
+        serializer = UserRegistrationSerializer(data=registration_data)
+        self.assertTrue(serializer.is_valid())
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            user = serializer.save()
+        
+        account = BankAccount.objects.get(user=user)
+        welcome = Transaction.objects.get(account=account)
+        self.assertEqual(welcome.amount, account.balance)
+        self.assertEqual(welcome.reference_number, f'DEMO{account.account_number}')
+    
     def test_user_registration_serializer_duplicate_email(self):
         """Test UserRegistrationSerializer with duplicate email"""
         registration_data = {
@@ -229,6 +250,15 @@ class CardSerializerTest(TestCase):
         self.assertNotIn('card_number', data)  # Full card number should not be exposed
         self.assertNotIn('cvv', data)  # CVV should not be exposed
         self.assertNotIn('pin', data)  # PIN should not be exposed
+    
+    def test_card_eager_loading_skips_sensitive_columns(self):
+        """Test card listings never load the full card number, CVV or PIN"""
+        card = CardSerializer.setup_eager_loading(Card.objects.all()).get()
+        deferred = card.get_deferred_fields()
+        
+        self.assertIn('card_number', deferred)
+        self.assertIn('cvv', deferred)
+        self.assertIn('pin', deferred)
 
 
 class TransferSerializerTest(TestCase):
@@ -298,38 +328,3 @@ class TransferSerializerTest(TestCase):
         self.assertFalse(serializer.is_valid())
         self.assertIn('amount', serializer.errors)
 
-
-class AccountValidationSerializerTest(TestCase):
-    """Test cases for Account Validation serializer"""
-    
-    def setUp(self):
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            phone_number='08123456789',
-            password='testpass123'
-        )
-        self.account_type = AccountType.objects.create(name='Savings')
-        self.account = BankAccount.objects.create(
-            user=self.user,
-            account_type=self.account_type
-        )
-    
-    def test_account_validation_serializer_valid(self):
-        """Test Account Validation serializer with valid account number"""
-        validation_data = {
-            'account_number': self.account.account_number
-        }
-        
-        serializer = AccountValidationSerializer(data=validation_data)
-        self.assertTrue(serializer.is_valid())
-    
-    def test_account_validation_serializer_invalid_length(self):
-        """Test Account Validation serializer with invalid account number length"""
-        validation_data = {
-            'account_number': '123'  # Too short
-        }
-        
-        serializer = AccountValidationSerializer(data=validation_data)
-        self.assertFalse(serializer.is_valid())
-        self.assertIn('account_number', serializer.errors)
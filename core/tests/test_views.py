@@ -1,9 +1,11 @@
 """
 Test cases for Core views and API endpoints
 """
+from unittest import mock
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -12,6 +14,7 @@ from core.models import (
     AccountType, BankAccount, TransactionCategory, 
     Transaction, Beneficiary, Card
 )
+from core.views import TxnCursorPagination
 
 User = get_user_model()
 
@@ -77,6 +80,19 @@ class AuthenticationViewTest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
+    def test_logout_revokes_token(self):
+        """Test logout deletes the token it was called with before responding"""
+        user = User.objects.create_user(**self.user_data)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        
+        response = self.client.post(reverse('auth-logout'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(key=token.key).exists())
+        response = self.client.get(reverse('user-profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
     def test_user_profile(self):
         """Test user profile endpoint"""
         user = User.objects.create_user(**self.user_data)
@@ -120,6 +136,62 @@ class BankAccountViewTest(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['balance'], '10000.00')
     
+    def test_list_accounts_query_count(self):
+        """Test account listing does not issue a query per account"""
+        BankAccount.objects.create(
+            user=self.user,
+            account_type=AccountType.objects.create(name='Current'),
+            account_number='0000000001',  # same phone would derive a duplicate number
+            is_primary=True
+        )
+        
+        url = reverse('bankaccount-list')
+        # token lookup, page count, accounts joined with user and account type
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_account_transactions_query_count(self):
+        """Test account transaction history does not issue a query per transaction"""
+        category = TransactionCategory.objects.create(name='Deposit')
+        for amount in (Decimal('100.00'), Decimal('200.00')):
+            Transaction.objects.create(
+                account=self.account,
+                transaction_type='CREDIT',
+                category=category,
+                amount=amount,
+                balance_before=Decimal('10000.00'),
+                balance_after=Decimal('10000.00') + amount,
+                description='Deposit'
+            )
+        
+        url = reverse('bankaccount-transactions', kwargs={'pk': self.account.pk})
+        # token lookup, account, page count, transactions joined with account and category
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_set_pin(self):
+        """Test the account owner can set a transaction PIN"""
+        url = reverse('bankaccount-set-pin', kwargs={'pk': self.account.pk})
+        response = self.client.post(url, {'pin': '1234', 'password': 'testpass123'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.check_pin('1234'))
+    
+    def test_set_pin_wrong_password(self):
+        """Test setting a PIN requires the account owner's password"""
+        url = reverse('bankaccount-set-pin', kwargs={'pk': self.account.pk})
+        response = self.client.post(url, {'pin': '1234', 'password': 'wrongpass'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.check_pin('1234'))
+    
     def test_account_detail(self):
         """Test getting account details"""
         url = reverse('account-detail', kwargs={'account_id': self.account.id})
@@ -170,12 +242,17 @@ class TransactionViewTest(APITestCase):
         self.sender_account = BankAccount.objects.create(
             user=self.user,
             account_type=self.account_type,
-            balance=Decimal('10000.00')
+            balance=Decimal('10000.00'),
+            available_balance=Decimal('10000.00'),
+            is_primary=True
         )
+        self.sender_account.set_pin('1234')
+        self.sender_account.save()
         self.recipient_account = BankAccount.objects.create(
             user=self.recipient,
             account_type=self.account_type,
-            balance=Decimal('5000.00')
+            balance=Decimal('5000.00'),
+            available_balance=Decimal('5000.00')
         )
         
         self.category = TransactionCategory.objects.create(name='Transfer')
@@ -201,17 +278,65 @@ class TransactionViewTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
     
+    def test_list_transactions_query_count(self):
+        """Test transaction listing does not issue a query per transaction"""
+        for amount in (Decimal('100.00'), Decimal('200.00')):
+            Transaction.objects.create(
+                account=self.sender_account,
+                transaction_type='DEBIT',
+                category=self.category,
+                amount=amount,
+                balance_before=Decimal('10000.00'),
+                balance_after=Decimal('10000.00') - amount,
+                description='Test transfer'
+            )
+        
+        url = reverse('transaction-list')
+        # token lookup, transaction rows joined with account and category (cursor paging, no count)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+    
+    def test_list_transactions_cursor_with_shared_timestamp(self):
+        """Test cursor paging neither repeats nor skips rows created at the same instant"""
+        for amount in (Decimal('100.00'), Decimal('200.00'), Decimal('300.00')):
+            Transaction.objects.create(
+                account=self.sender_account,
+                transaction_type='DEBIT',
+                category=self.category,
+                amount=amount,
+                balance_before=Decimal('10000.00'),
+                balance_after=Decimal('10000.00') - amount,
+                description='Test transfer'
+            )
+        Transaction.objects.update(created_at=timezone.now())  # Like both legs of one transfer
+        
+        seen = []
+        url = reverse('transaction-list')
+        with mock.patch.object(TxnCursorPagination, 'page_size', 2):
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                seen.extend(row['id'] for row in response.data['results'])
+                url = response.data['next']
+        
+        expected = list(Transaction.objects.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+    
     def test_transfer_money(self):
         """Test money transfer between accounts"""
-        url = reverse('transfer')
+        url = reverse('transaction-transfer')
         data = {
             'recipient_account_number': self.recipient_account.account_number,
             'amount': '1000.00',
-            'description': 'Test transfer'
+            'description': 'Test transfer',
+            'pin': '1234'
         }
         response = self.client.post(url, data, format='json')
         
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Check balances updated
         self.sender_account.refresh_from_db()
@@ -221,11 +346,12 @@ class TransactionViewTest(APITestCase):
     
     def test_transfer_insufficient_funds(self):
         """Test transfer with insufficient funds"""
-        url = reverse('transfer')
+        url = reverse('transaction-transfer')
         data = {
             'recipient_account_number': self.recipient_account.account_number,
             'amount': '15000.00',  # More than balance
-            'description': 'Test transfer'
+            'description': 'Test transfer',
+            'pin': '1234'
         }
         response = self.client.post(url, data, format='json')
         
@@ -233,15 +359,33 @@ class TransactionViewTest(APITestCase):
     
     def test_transfer_to_invalid_account(self):
         """Test transfer to non-existent account"""
-        url = reverse('transfer')
+        url = reverse('transaction-transfer')
         data = {
             'recipient_account_number': '9999999999',
             'amount': '1000.00',
-            'description': 'Test transfer'
+            'description': 'Test transfer',
+            'pin': '1234'
         }
         response = self.client.post(url, data, format='json')
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_transfer_invalid_pin(self):
+        """Test transfer is rejected with a wrong PIN and no money moves"""
+        url = reverse('transaction-transfer')
+        data = {
+            'recipient_account_number': self.recipient_account.account_number,
+            'amount': '1000.00',
+            'description': 'Test transfer',
+            'pin': '4321'
+        }
+        response = self.client.post(url, data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Invalid PIN')
+        self.sender_account.refresh_from_db()
+        self.assertEqual(self.sender_account.balance, Decimal('10000.00'))
+        self.assertFalse(Transaction.objects.exists())
 
 
 class BeneficiaryViewTest(APITestCase):
@@ -333,11 +477,25 @@ class HealthCheckViewTest(APITestCase):
     
     def test_health_check(self):
         """Test health check endpoint"""
-        url = reverse('health')
+        url = reverse('health_check')
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['status'], 'healthy')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json()['status'], 'healthy')
+        self.assertIn('timestamp', response.json())
+    
+    def test_health_check_get_only(self):
+        """Test health check rejects other methods"""
+        response = self.client.post(reverse('health_check'))
+        
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    def test_health_check_head(self):
+        """Test health check answers HEAD probes from load balancers"""
+        response = self.client.head(reverse('health_check'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
 class UnauthorizedAccessTest(APITestCase):
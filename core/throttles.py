@@ -0,0 +1,15 @@
+"""
+Request throttles for the core app
+"""
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """
+    Limit login attempts per client IP, authenticated or not, so bursts of
+    guesses can't keep a worker busy running the password hasher.
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
@@ -1,34 +1,112 @@
-from rest_framework import status, viewsets, permissions
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework import serializers, status, viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from django.contrib.auth import login, logout
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_safe
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
+from functools import lru_cache
+import json
+import time
+from .audit import client_context, log_action
+from .lookups import get_transaction_category_id
+from .mixins import EagerLoadingMixin
 from .models import (
     User, BankAccount, Transaction, Beneficiary, Card, 
-    AccountType, TransactionCategory, AuditLog
+    AccountType, TransactionCategory
 )
 from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer, LoginSerializer,
     BankAccountSerializer, TransactionSerializer, TransferSerializer,
-    BeneficiarySerializer, CardSerializer, ChangePasswordSerializer,
+    BeneficiarySerializer, CardSerializer, ChangePasswordSerializer, SetPinSerializer,
     AccountTypeSerializer, TransactionCategorySerializer
 )
+from .throttles import LoginRateThrottle
 
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
+@lru_cache(maxsize=1)
+def _health_body(second):
+    return json.dumps({
+        'status': 'healthy',
+        'timestamp': datetime.fromtimestamp(second, tz=dt_timezone.utc).isoformat(),
+        'message': 'Banking API is running'
+    }).encode()
+
+
+@require_safe
 def health_check(request):
     """
-    Simple health check endpoint to verify backend is running
+    Simple health check endpoint to verify backend is running.
+    Polled constantly by load balancers, so it bypasses DRF and reuses the
+    encoded body for the current second.
     """
-    return Response({
-        'status': 'healthy',
-        'timestamp': timezone.now().isoformat(),
-        'message': 'Banking API is running'
-    }, status=status.HTTP_200_OK)
+    return HttpResponse(_health_body(int(time.time())), content_type='application/json')
+
+
+TRANSACTION_DECIMAL_FIELDS = ('amount', 'balance_before', 'balance_after')
+
+_date_joined_field = serializers.DateTimeField()
+
+
+def _user_payload(user):
+    """Same shape as UserProfileSerializer(user).data, built without the serializer"""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'phone_number': user.phone_number,
+        'date_of_birth': user.date_of_birth.isoformat() if user.date_of_birth else None,
+        'address': user.address,
+        'is_verified': user.is_verified,
+        'two_factor_enabled': user.two_factor_enabled,
+        'date_joined': _date_joined_field.to_representation(user.date_joined),
+    }
+
+
+class TransactionPagination(PageNumberPagination):
+    page_size = 50
+
+
+class TxnCursorPagination(CursorPagination):
+    # Keyset paging on -created_at (txn_created_idx, or txn_account_created_idx
+    # for a single account): no COUNT, no OFFSET scan. The two legs of a
+    # transfer are bulk-created together and can share a timestamp, so id
+    # breaks ties to keep the cursor position stable
+    ordering = ('-created_at', '-id')
+    page_size = 50
+
+
+def _transaction_rows(view, queryset):
+    """
+    Paginate transactions as .values() rows rather than model instances run
+    through TransactionSerializer; the response shape is unchanged.
+    """
+    rows = queryset.order_by('-created_at', '-id').values(
+        'id', 'transaction_type', 'category', 'amount', 'balance_before',
+        'balance_after', 'description', 'reference_number', 'status',
+        'recipient_account_number', 'recipient_name', 'sender_account_number',
+        'sender_name', 'created_at', 'updated_at',
+        account_number=F('account__account_number'),
+        category_name=F('category__name')
+    )
+    page = view.paginate_queryset(rows)
+    for row in page:
+        for field in TRANSACTION_DECIMAL_FIELDS:
+            row[field] = str(row[field])  # serializers render decimals as strings
+    return page
 
 
 class AuthViewSet(viewsets.GenericViewSet):
@@ -42,42 +120,32 @@ class AuthViewSet(viewsets.GenericViewSet):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            token, created = Token.objects.get_or_create(user=user)
+            token = user.auth_token  # created alongside the user
             
             # Create audit log
-            AuditLog.objects.create(
-                user=user,
-                action_type='LOGIN',
-                description='User registered and logged in',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT')
-            )
+            log_action(request, 'LOGIN', 'User registered and logged in', user=user)
             
             return Response({
-                'user': UserProfileSerializer(user).data,
+                'user': _user_payload(user),
                 'token': token.key
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LoginRateThrottle])
     def login(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            login(request, user)
+            # Clients authenticate with the token; a session is only opt-in
+            if settings.ISSUE_SESSION_ON_TOKEN_LOGIN:
+                login(request, user)
             token, created = Token.objects.get_or_create(user=user)
             
             # Create audit log
-            AuditLog.objects.create(
-                user=user,
-                action_type='LOGIN',
-                description='User logged in',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT')
-            )
+            log_action(request, 'LOGIN', 'User logged in', user=user)
             
             return Response({
-                'user': UserProfileSerializer(user).data,
+                'user': _user_payload(user),
                 'token': token.key
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -86,19 +154,11 @@ class AuthViewSet(viewsets.GenericViewSet):
     def logout(self, request):
         if request.user.is_authenticated:
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
-                action_type='LOGOUT',
-                description='User logged out',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT')
-            )
+            log_action(request, 'LOGOUT', 'User logged out')
             
-            # Delete token
-            try:
-                request.user.auth_token.delete()
-            except:
-                pass
+            # Revoke the token this request authenticated with
+            if isinstance(request.auth, Token):
+                Token.objects.filter(key=request.auth.key).delete()
             
             logout(request)
         return Response({'message': 'Successfully logged out'})
@@ -124,13 +184,7 @@ class UserViewSet(viewsets.GenericViewSet):
             serializer.save()
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
-                action_type='ACCOUNT_UPDATE',
-                description='Profile updated',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT')
-            )
+            log_action(request, 'ACCOUNT_UPDATE', 'Profile updated')
             
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -140,27 +194,22 @@ class UserViewSet(viewsets.GenericViewSet):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             request.user.set_password(serializer.validated_data['new_password'])
-            request.user.save()
+            request.user.save(update_fields=['password', 'updated_at'])
             
             # Create audit log
-            AuditLog.objects.create(
-                user=request.user,
-                action_type='PASSWORD_CHANGE',
-                description='Password changed',
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT')
-            )
+            log_action(request, 'PASSWORD_CHANGE', 'Password changed')
             
             return Response({'message': 'Password changed successfully'})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class BankAccountViewSet(viewsets.ReadOnlyModelViewSet):
+class BankAccountViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
     """
     Bank account management
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = BankAccountSerializer
+    pagination_class = TransactionPagination
 
     def get_queryset(self):
         return BankAccount.objects.filter(user=self.request.user)
@@ -168,13 +217,33 @@ class BankAccountViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['get'])
     def transactions(self, request, pk=None):
         account = self.get_object()
-        transactions = Transaction.objects.filter(account=account)
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        return self.get_paginated_response(
+            _transaction_rows(self, Transaction.objects.filter(account=account))
+        )
+
+    @action(detail=True, methods=['post'])
+    def set_pin(self, request, pk=None):
+        account = get_object_or_404(
+            BankAccount.objects.only('id', 'pin'), pk=pk, user=request.user
+        )
+        serializer = SetPinSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        account.set_pin(serializer.validated_data['pin'])
+        account.save(update_fields=['pin', 'updated_at'])
+        
+        # Create audit log
+        log_action(request, 'ACCOUNT_UPDATE', f'Transaction PIN set for account {pk}')
+        
+        return Response({'message': 'PIN set successfully'})
 
     @action(detail=True, methods=['get'])
     def balance(self, request, pk=None):
-        account = self.get_object()
+        account = get_object_or_404(
+            BankAccount.objects.only('account_number', 'balance', 'available_balance'),
+            pk=pk, user=request.user
+        )
         return Response({
             'account_number': account.account_number,
             'balance': account.balance,
@@ -182,16 +251,21 @@ class BankAccountViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
     """
     Transaction history and management
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = TransactionSerializer
+    pagination_class = TxnCursorPagination
 
     def get_queryset(self):
-        user_accounts = BankAccount.objects.filter(user=self.request.user)
-        return Transaction.objects.filter(account__in=user_accounts)
+        return Transaction.objects.filter(account__user=self.request.user).order_by('-created_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        return self.get_paginated_response(
+            _transaction_rows(self, self.get_queryset())
+        )
 
     @action(detail=False, methods=['post'])
     def transfer(self, request):
@@ -199,129 +273,142 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        # Get sender's primary account
-        try:
-            sender_account = BankAccount.objects.get(
-                user=request.user, is_primary=True, status='ACTIVE'
-            )
-        except BankAccount.DoesNotExist:
+        # Fetch the sender's primary account and the recipient in one query
+        recipient_account_number = serializer.validated_data['recipient_account_number']
+        sender_account = recipient_account = None
+        for account in BankAccount.objects.select_related('user').filter(
+            Q(user=request.user, is_primary=True) | Q(account_number=recipient_account_number),
+            status='ACTIVE'
+        ):
+            if account.user_id == request.user.pk and account.is_primary:
+                sender_account = account
+            if account.account_number == recipient_account_number:
+                recipient_account = account
+
+        if sender_account is None:
             return Response(
                 {'error': 'No active primary account found'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Validate PIN
-        if sender_account.pin != serializer.validated_data['pin']:
+        if not sender_account.check_pin(serializer.validated_data['pin']):
             return Response(
                 {'error': 'Invalid PIN'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Check if recipient account exists
-        recipient_account_number = serializer.validated_data['recipient_account_number']
-        try:
-            recipient_account = BankAccount.objects.get(
-                account_number=recipient_account_number, status='ACTIVE'
-            )
-        except BankAccount.DoesNotExist:
+        if recipient_account is None:
             return Response(
                 {'error': 'Recipient account not found'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        amount = serializer.validated_data['amount']
-        description = serializer.validated_data['description']
-
-        # Check balance
-        if sender_account.balance < amount:
+        if recipient_account.pk == sender_account.pk:
             return Response(
-                {'error': 'Insufficient balance'}, 
+                {'error': 'Cannot transfer to the same account'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        amount = serializer.validated_data['amount']
+        description = serializer.validated_data['description']
+
         # Perform transfer with database transaction
-        try:
-            with transaction.atomic():
-                # Get transfer category
-                transfer_category, _ = TransactionCategory.objects.get_or_create(
-                    name='Transfer',
-                    defaults={'description': 'Money Transfer'}
+        with transaction.atomic(durable=True):
+            # Lock both rows in one query, in pk order so concurrent transfers
+            # between the same accounts can't deadlock, and use their balances
+            locked = {
+                account.pk: account
+                for account in BankAccount.objects.select_for_update().filter(
+                    pk__in=[sender_account.pk, recipient_account.pk], status='ACTIVE'
+                ).order_by('pk').only('id', 'balance', 'available_balance')
+            }
+            if len(locked) != 2:
+                return Response(
+                    {'error': 'Account is no longer active'}, 
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-
-                # Debit sender
-                sender_balance_before = sender_account.balance
-                sender_account.balance -= amount
-                sender_account.available_balance -= amount
-                sender_account.save()
-
-                # Credit recipient
-                recipient_balance_before = recipient_account.balance
-                recipient_account.balance += amount
-                recipient_account.available_balance += amount
-                recipient_account.save()
-
-                # Create debit transaction
-                debit_transaction = Transaction.objects.create(
-                    account=sender_account,
-                    transaction_type='DEBIT',
-                    category=transfer_category,
-                    amount=amount,
-                    balance_before=sender_balance_before,
-                    balance_after=sender_account.balance,
-                    description=f"Transfer to {recipient_account.user.get_full_name()}",
-                    recipient_account_number=recipient_account_number,
-                    recipient_name=recipient_account.user.get_full_name(),
-                    status='COMPLETED',
-                    ip_address=request.META.get('REMOTE_ADDR'),
-                    user_agent=request.META.get('HTTP_USER_AGENT')
+            for account in (sender_account, recipient_account):
+                account.balance = locked[account.pk].balance
+                account.available_balance = locked[account.pk].available_balance
+
+            # Check balance
+            if sender_account.balance < amount:
+                return Response(
+                    {'error': 'Insufficient balance'}, 
+                    status=status.HTTP_400_BAD_REQUEST
                 )
 
-                # Create credit transaction
-                credit_transaction = Transaction.objects.create(
-                    account=recipient_account,
-                    transaction_type='CREDIT',
-                    category=transfer_category,
-                    amount=amount,
-                    balance_before=recipient_balance_before,
-                    balance_after=recipient_account.balance,
-                    description=f"Transfer from {sender_account.user.get_full_name()}",
-                    sender_account_number=sender_account.account_number,
-                    sender_name=sender_account.user.get_full_name(),
-                    status='COMPLETED',
-                    ip_address=request.META.get('REMOTE_ADDR'),
-                    user_agent=request.META.get('HTTP_USER_AGENT')
-                )
+            # Get transfer category
+            transfer_category_id = get_transaction_category_id(
+                'Transfer', description='Money Transfer'
+            )
 
-                # Create audit log
-                AuditLog.objects.create(
-                    user=request.user,
-                    action_type='TRANSACTION',
-                    description=f'Transfer of {amount} to {recipient_account_number}',
-                    ip_address=request.META.get('REMOTE_ADDR'),
-                    user_agent=request.META.get('HTTP_USER_AGENT'),
-                    additional_data={
-                        'amount': str(amount),
-                        'recipient_account': recipient_account_number,
-                        'reference_number': debit_transaction.reference_number
-                    }
-                )
+            # Debit sender and credit recipient in a single UPDATE
+            BankAccount.move_funds(sender_account, recipient_account, amount)
+            sender_balance_before = sender_account.balance + amount
+            recipient_balance_before = recipient_account.balance - amount
+
+            # Create debit and credit transactions in one INSERT
+            ip_address, user_agent = client_context(request)
+            debit_transaction = Transaction(
+                account=sender_account,
+                transaction_type='DEBIT',
+                category_id=transfer_category_id,
+                amount=amount,
+                balance_before=sender_balance_before,
+                balance_after=sender_account.balance,
+                description=f"Transfer to {recipient_account.user.get_full_name()}",
+                recipient_account_number=recipient_account_number,
+                recipient_name=recipient_account.user.get_full_name(),
+                status='COMPLETED',
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
 
-                return Response({
-                    'message': 'Transfer successful',
-                    'reference_number': debit_transaction.reference_number,
-                    'amount': amount,
-                    'recipient_account': recipient_account_number,
-                    'new_balance': sender_account.balance
-                })
+            credit_transaction = Transaction(
+                account=recipient_account,
+                transaction_type='CREDIT',
+                category_id=transfer_category_id,
+                amount=amount,
+                balance_before=recipient_balance_before,
+                balance_after=recipient_account.balance,
+                description=f"Transfer from {sender_account.user.get_full_name()}",
+                sender_account_number=sender_account.account_number,
+                sender_name=sender_account.user.get_full_name(),
+                status='COMPLETED',
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            # bulk_create bypasses save(), which normally assigns these
+            for txn in (debit_transaction, credit_transaction):
+                txn.reference_number = txn.generate_reference_number()
+            Transaction.objects.bulk_create([debit_transaction, credit_transaction])
 
-        except Exception as e:
-            return Response(
-                {'error': 'Transfer failed. Please try again.'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            # Create audit log
+            log_action(
+                request,
+                'TRANSACTION',
+                f'Transfer of {amount} to {recipient_account_number}',
+                reference_number=debit_transaction.reference_number,
+                additional_data={
+                    'amount': str(amount),
+                    'recipient_account': recipient_account_number,
+                    'reference_number': debit_transaction.reference_number
+                }
             )
 
+        return Response({
+            'message': 'Transfer successful',
+            'reference_number': debit_transaction.reference_number,
+            'amount': amount,
+            'recipient_account': recipient_account_number,
+            'new_balance': sender_account.balance
+        })
 
-class BeneficiaryViewSet(viewsets.ModelViewSet):
+
+class BeneficiaryViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     Beneficiary management
     """
@@ -335,16 +422,12 @@ class BeneficiaryViewSet(viewsets.ModelViewSet):
         beneficiary = serializer.save(user=self.request.user)
         
         # Create audit log
-        AuditLog.objects.create(
-            user=self.request.user,
-            action_type='BENEFICIARY_OP',
-            description=f'Added beneficiary: {beneficiary.name}',
-            ip_address=self.request.META.get('REMOTE_ADDR'),
-            user_agent=self.request.META.get('HTTP_USER_AGENT')
+        log_action(
+            self.request, 'BENEFICIARY_OP', f'Added beneficiary: {beneficiary.account_name}'
         )
 
 
-class CardViewSet(viewsets.ReadOnlyModelViewSet):
+class CardViewSet(EagerLoadingMixin, viewsets.ReadOnlyModelViewSet):
     """
     Card management
     """
@@ -352,44 +435,39 @@ class CardViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CardSerializer
 
     def get_queryset(self):
-        user_accounts = BankAccount.objects.filter(user=self.request.user)
-        return Card.objects.filter(account__in=user_accounts)
+        return Card.objects.filter(account__user=self.request.user)
+
+    def _set_status(self, pk, new_status):
+        """Update a card's status in one UPDATE, with ownership checked in the WHERE clause"""
+        try:
+            return Card.objects.filter(pk=pk, account__user=self.request.user).update(
+                status=new_status, updated_at=timezone.now()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            return 0  # malformed card id
 
     @action(detail=True, methods=['post'])
     def block_card(self, request, pk=None):
-        card = self.get_object()
-        card.status = 'BLOCKED'
-        card.save()
+        if not self._set_status(pk, 'BLOCKED'):
+            return Response({'error': 'Card not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Create audit log
-        AuditLog.objects.create(
-            user=request.user,
-            action_type='CARD_OPERATION',
-            description=f'Blocked card: {card.masked_card_number}',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
-        )
+        log_action(request, 'CARD_OPERATION', f'Blocked card: {pk}')
         
         return Response({'message': 'Card blocked successfully'})
 
     @action(detail=True, methods=['post'])
     def unblock_card(self, request, pk=None):
-        card = self.get_object()
-        card.status = 'ACTIVE'
-        card.save()
+        if not self._set_status(pk, 'ACTIVE'):
+            return Response({'error': 'Card not found'}, status=status.HTTP_404_NOT_FOUND)
         
         # Create audit log
-        AuditLog.objects.create(
-            user=request.user,
-            action_type='CARD_OPERATION',
-            description=f'Unblocked card: {card.masked_card_number}',
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT')
-        )
+        log_action(request, 'CARD_OPERATION', f'Unblocked card: {pk}')
         
         return Response({'message': 'Card unblocked successfully'})
 
 
+@method_decorator(cache_page(60 * 60), name='list')
 class AccountTypeViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Account types available
@@ -399,6 +477,7 @@ class AccountTypeViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = AccountType.objects.filter(is_active=True)
 
 
+@method_decorator(cache_page(60 * 15), name='list')
 class TransactionCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Transaction categories